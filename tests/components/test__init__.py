@@ -1,4 +1,8 @@
 """Test component module."""
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import ModuleType
 from unittest.mock import MagicMock, Mock, call, patch
 
 import pytest
@@ -8,23 +12,49 @@ from viseron.components import (
     DEFAULT_COMPONENTS,
     Component,
     DomainToSetup,
+    _cached_import,
+    domain_dependencies,
     domain_setup_status,
     setup_component,
     setup_components,
+    setup_domains,
 )
 from viseron.const import (
     DOMAIN_FAILED,
+    DOMAIN_IDENTIFIERS,
     DOMAIN_LOADED,
     DOMAIN_LOADING,
+    DOMAIN_SETUP_TASKS,
     DOMAINS_TO_SETUP,
     FAILED,
     LOADED,
     LOADING,
 )
+from viseron.domains import OptionalDomain, RequireDomain
+from viseron.exceptions import DomainNotReady
 
 from tests.common import MockComponent, return_any
 
 
+def test_cached_import():
+    """Test that only fully imported modules are returned from sys.modules."""
+    module = ModuleType("viseron_test_module")
+    spec = MagicMock(_initializing=True)
+    module.__spec__ = spec
+    with patch.dict(sys.modules, {"viseron_test_module": module}), patch(
+        "viseron.components.importlib.import_module"
+    ) as mock_import_module:
+        assert _cached_import("viseron_test_module") is (
+            mock_import_module.return_value
+        )
+        mock_import_module.assert_called_once_with("viseron_test_module")
+
+        mock_import_module.reset_mock()
+        spec._initializing = False  # pylint: disable=protected-access
+        assert _cached_import("viseron_test_module") is module
+        mock_import_module.assert_not_called()
+
+
 def test_setup_components(vis, caplog):
     """Test setup of core and default components."""
     setup_components(vis, {"logger": {}})
@@ -38,9 +68,8 @@ def test_setup_components(vis, caplog):
 def test_setup_components_2(vis, caplog):
     """Test setup of component."""
     with patch("viseron.components.setup_component") as mock_setup_component, patch(
-        "threading.Thread.is_alive"
-    ) as mock_is_alive, patch("viseron.components.get_component") as mock_get_component:
-        mock_is_alive.return_value = True
+        "viseron.components.get_component"
+    ) as mock_get_component:
         setup_components(vis, {"mqtt": {}})
         assert (
             mock_setup_component.call_count
@@ -55,6 +84,24 @@ def test_setup_components_2(vis, caplog):
         mock_get_component.assert_called_with(vis, "mqtt", {"mqtt": {}})
 
 
+def test_setup_components_timeout(vis, caplog):
+    """Test that components that don't finish in time are logged."""
+    setup_done = threading.Event()
+    with patch("viseron.components.setup_component") as mock_setup_component, patch(
+        "viseron.components.get_component",
+        side_effect=lambda _vis, component, _config: MockComponent(component),
+    ), patch("viseron.components.COMPONENT_SETUP_TIMEOUT", 0.1):
+        mock_setup_component.side_effect = (
+            lambda vis, component: setup_done.wait()
+            if component.name == "mqtt"
+            else None
+        )
+        setup_components(vis, {"mqtt": {}})
+    assert "mqtt_setup did not finish in time" in caplog.text
+    setup_done.set()
+    caplog.clear()
+
+
 @pytest.mark.parametrize(
     "component, loaded, loading, failed, caplog_text",
     [
@@ -142,6 +189,231 @@ def test_domain_setup_status_failed(vis):
     assert vis.data[DOMAIN_FAILED]["object_detector"]["identifier1"] == domain_to_setup
 
 
+def test_domain_dependencies(vis, caplog):
+    """Test that domains with unresolved dependencies are removed."""
+    component = MagicMock(domains_to_setup=[])
+    camera = DomainToSetup(component, "camera", {}, "camera1", [], [])
+    nvr = DomainToSetup(
+        component, "nvr", {}, "camera2", [RequireDomain("camera", "camera2")], []
+    )
+    component.domains_to_setup.extend([camera, nvr])
+    vis.data[DOMAINS_TO_SETUP] = {
+        "camera": {"camera1": camera},
+        "nvr": {"camera2": nvr},
+    }
+    with patch("viseron.components.domain_setup_status"):
+        domain_dependencies(vis)
+    assert vis.data[DOMAIN_IDENTIFIERS] == {
+        "camera": {"camera1"},
+        "nvr": {"camera2"},
+    }
+    assert vis.data[DOMAINS_TO_SETUP] == {"camera": {"camera1": camera}, "nvr": {}}
+    assert component.domains_to_setup == [camera]
+    assert (
+        "requires domain camera with identifier camera2 but it has not been setup"
+        in caplog.text
+    )
+    caplog.clear()
+
+
+def test_setup_domains(vis):
+    """Test that domains are set up after their dependencies."""
+    order = []
+
+    def _setup_domain(_executor, domain_to_setup, future):
+        order.append(domain_to_setup.domain)
+        future.set_result(True)
+
+    component = MagicMock(setup_domain=_setup_domain)
+    vis.data[DOMAINS_TO_SETUP] = {
+        "nvr": {
+            "camera1": DomainToSetup(
+                component,
+                "nvr",
+                {},
+                "camera1",
+                [RequireDomain("camera", "camera1")],
+                [OptionalDomain("object_detector", "camera1")],
+            )
+        },
+        "camera": {
+            "camera1": DomainToSetup(component, "camera", {}, "camera1", [], [])
+        },
+    }
+    setup_domains(vis)
+    assert order == ["camera", "nvr"]
+    assert vis.data[DOMAIN_SETUP_TASKS]["nvr"]["camera1"].result() is True
+
+
+def test_setup_domains_error(vis):
+    """Test that dependents are cancelled if the setup of a domain raises."""
+    order = []
+
+    def _setup_domain(_executor, domain_to_setup, future):
+        order.append(domain_to_setup.domain)
+        future.set_exception(ValueError("Setup failed"))
+
+    component = MagicMock(setup_domain=_setup_domain)
+    vis.data[DOMAINS_TO_SETUP] = {
+        "nvr": {
+            "camera1": DomainToSetup(
+                component,
+                "nvr",
+                {},
+                "camera1",
+                [RequireDomain("camera", "camera1")],
+                [],
+            )
+        },
+        "camera": {
+            "camera1": DomainToSetup(component, "camera", {}, "camera1", [], [])
+        },
+    }
+    with pytest.raises(ValueError, match="Setup failed"):
+        setup_domains(vis)
+    assert order == ["camera"]
+    assert vis.data[DOMAIN_SETUP_TASKS]["nvr"]["camera1"].cancelled()
+
+
+def test_setup_domains_slow_dependency_warning(vis, caplog):
+    """Test that domains waiting for their dependencies are logged."""
+
+    def _setup_domain(_executor, domain_to_setup, future):
+        if domain_to_setup.domain == "camera":
+            slow_dependency_warning, _trigger = mock_add_job.call_args.args
+            slow_dependency_warning()
+        future.set_result(True)
+
+    component = MagicMock(setup_domain=_setup_domain)
+    component.name = "component1"
+    vis.data[DOMAINS_TO_SETUP] = {
+        "nvr": {
+            "camera1": DomainToSetup(
+                component,
+                "nvr",
+                {},
+                "camera1",
+                [RequireDomain("camera", "camera1")],
+                [],
+            )
+        },
+        "camera": {
+            "camera1": DomainToSetup(component, "camera", {}, "camera1", [], [])
+        },
+    }
+    with patch.object(vis.background_scheduler, "add_job") as mock_add_job:
+        setup_domains(vis)
+
+    mock_add_job.return_value.remove.assert_called_once()
+    assert (
+        "Domain nvr for component component1 with identifier camera1 is still "
+        "waiting for dependencies: ['domain: camera, identifier: camera1']"
+    ) in caplog.text
+    caplog.clear()
+
+
+def test_setup_dependencies_failed(vis, caplog):
+    """Test that all failed dependencies are logged."""
+    component = Component(vis, "component1", "component1", {})
+    domain_to_setup = DomainToSetup(
+        component,
+        "nvr",
+        {},
+        "camera1",
+        [
+            RequireDomain("camera", "camera1"),
+            RequireDomain("object_detector", "camera1"),
+        ],
+        [],
+    )
+    for domain in ("camera", "object_detector"):
+        future: Future = Future()
+        setattr(future, "domain", domain)
+        setattr(future, "identifier", "camera1")
+        future.set_result(False)
+        vis.data[DOMAIN_SETUP_TASKS][domain] = {"camera1": future}
+
+    assert (
+        component._setup_dependencies(  # pylint: disable=protected-access
+            domain_to_setup
+        )
+        is False
+    )
+    assert "domain: camera, identifier: camera1" in caplog.text
+    assert "domain: object_detector, identifier: camera1" in caplog.text
+    caplog.clear()
+
+
+def test_setup_domains_circular_dependency(vis, caplog):
+    """Test that domains with circular dependencies fail."""
+    component = MagicMock()
+    vis.data[DOMAINS_TO_SETUP] = {
+        "nvr": {
+            "camera1": DomainToSetup(
+                component,
+                "nvr",
+                {},
+                "camera1",
+                [RequireDomain("camera", "camera1")],
+                [],
+            )
+        },
+        "camera": {
+            "camera1": DomainToSetup(
+                component,
+                "camera",
+                {},
+                "camera1",
+                [RequireDomain("nvr", "camera1")],
+                [],
+            )
+        },
+    }
+    with patch("viseron.components.domain_setup_status"):
+        setup_domains(vis)
+    component.setup_domain.assert_not_called()
+    assert vis.data[DOMAIN_SETUP_TASKS]["nvr"]["camera1"].result() is False
+    assert vis.data[DOMAIN_SETUP_TASKS]["camera"]["camera1"].result() is False
+    assert "is part of, or depends on, a circular dependency" in caplog.text
+    caplog.clear()
+
+
+def test_setup_domains_removed_dependency(vis, caplog):
+    """Test that domains depending on a removed domain fail."""
+    component = MagicMock()
+    vis.data[DOMAINS_TO_SETUP] = {
+        "nvr": {
+            "camera1": DomainToSetup(
+                component,
+                "nvr",
+                {},
+                "camera1",
+                [RequireDomain("camera", "camera1")],
+                [],
+            )
+        },
+        "camera": {
+            "camera1": DomainToSetup(
+                component,
+                "camera",
+                {},
+                "camera1",
+                [RequireDomain("object_detector", "camera1")],
+                [],
+            )
+        },
+    }
+    with patch("viseron.components.domain_setup_status"):
+        setup_domains(vis)
+    component.setup_domain.assert_not_called()
+    assert vis.data[DOMAIN_SETUP_TASKS]["nvr"]["camera1"].result() is False
+    assert (
+        "Domain nvr for component %s with identifier camera1 depends on domains "
+        "that could not be setup: domain: camera, identifier: camera1" % component.name
+    ) in caplog.text
+    caplog.clear()
+
+
 class TestComponent:
     """Test Component class."""
 
@@ -167,3 +439,51 @@ class TestComponent:
             "identifier1 for component component2" in caplog.text
         )
         caplog.clear()
+
+    def test_setup_domain_not_ready(self, vis):
+        """Test that a domain that is not ready is retried using the scheduler."""
+        component = Component(vis, "component1", "component1", {})
+        domain_to_setup = DomainToSetup(
+            component, "camera", {"name": "test"}, "identifier1", [], []
+        )
+        domain_module = MagicMock(spec=["setup"])
+        domain_module.setup.side_effect = [DomainNotReady("not ready"), True]
+        with patch.object(
+            component, "get_domain", return_value=domain_module
+        ), patch.object(vis.background_scheduler, "add_job") as mock_add_job, patch(
+            "viseron.components.domain_setup_status"
+        ), ThreadPoolExecutor(
+            max_workers=1
+        ) as executor:
+            future = component.setup_domain(executor, domain_to_setup)
+            # Wait for the first attempt to finish
+            executor.submit(lambda: None).result()
+            mock_add_job.assert_called_once()
+            retry, trigger = mock_add_job.call_args.args
+            assert trigger == "date"
+            assert not future.done()
+            assert domain_to_setup.retrying
+
+            retry(
+                *mock_add_job.call_args.kwargs["args"],
+                **mock_add_job.call_args.kwargs["kwargs"],
+            )
+            assert future.result(timeout=5) is True
+        assert domain_module.setup.call_count == 2
+
+    def test_setup_domain_executor_shutdown(self, vis):
+        """Test that a retry after the executor is shut down resolves the future."""
+        component = Component(vis, "component1", "component1", {})
+        domain_to_setup = DomainToSetup(
+            component, "camera", {"name": "test"}, "identifier1", [], []
+        )
+        executor = ThreadPoolExecutor(max_workers=1)
+        executor.shutdown()
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+        assert (
+            component.setup_domain(executor, domain_to_setup, future=future, tries=2)
+            is future
+        )
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
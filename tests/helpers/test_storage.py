@@ -0,0 +1,56 @@
+"""Test the storage helper."""
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from viseron.helpers.storage import Storage, StorageWriteError
+
+
+@pytest.fixture(name="storage_path")
+def fixture_storage_path(tmp_path):
+    """Patch the storage path to a temporary directory."""
+    with patch("viseron.helpers.storage.STORAGE_PATH", str(tmp_path)):
+        yield tmp_path
+
+
+class TestStorage:
+    """Test the Storage class."""
+
+    def test_save_load(self, storage_path):
+        """Test that saved data can be loaded."""
+        storage = Storage(MagicMock(), "test", version=2)
+        storage.save({"key": "value"})
+        assert storage.load() == {"key": "value"}
+        assert os.listdir(storage_path) == ["test"]
+
+    def test_load_missing_file(self, storage_path):
+        """Test that a missing file loads as empty data."""
+        storage = Storage(MagicMock(), "missing")
+        assert storage.load() == {}
+        assert os.listdir(storage_path) == []
+
+    def test_write_error_removes_temp_file(self, storage_path):
+        """Test that the temp file is removed if it could not be moved into place."""
+        storage = Storage(MagicMock(), "test")
+        with patch(
+            "viseron.helpers.storage.os.replace", side_effect=OSError("failed")
+        ), pytest.raises(StorageWriteError):
+            storage.save({"key": "value"})
+        assert os.listdir(storage_path) == []
+
+    def test_serialize_error_keeps_file(self, storage_path):
+        """Test that data which can not be serialized does not replace the file."""
+        storage = Storage(MagicMock(), "test")
+        storage.save({"key": "value"})
+        with pytest.raises(TypeError):
+            storage.save({"key": object()})
+        assert storage.load() == {"key": "value"}
+        assert os.listdir(storage_path) == ["test"]
+
+    def test_load_during_save(self, storage_path):
+        """Test that load does not wait for an ongoing save."""
+        storage = Storage(MagicMock(), "test")
+        storage.save({"key": "value"})
+        with storage._lock:  # pylint: disable=protected-access
+            assert storage.load() == {"key": "value"}
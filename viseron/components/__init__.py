@@ -3,12 +3,15 @@ from __future__ import annotations
 
 import importlib
 import logging
+import sys
 import threading
-import time
-import traceback
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
+from datetime import timedelta
+from functools import partial
+from itertools import chain
 from timeit import default_timer as timer
+from types import ModuleType
 from typing import TYPE_CHECKING, Any, Literal
 
 import voluptuous as vol
@@ -17,6 +20,7 @@ from voluptuous.humanize import humanize_error
 from viseron.const import (
     COMPONENT_RETRY_INTERVAL,
     COMPONENT_RETRY_INTERVAL_MAX,
+    COMPONENT_SETUP_TIMEOUT,
     DOMAIN_FAILED,
     DOMAIN_IDENTIFIERS,
     DOMAIN_LOADED,
@@ -31,10 +35,10 @@ from viseron.const import (
     LOADING,
     SLOW_DEPENDENCY_WARNING,
     SLOW_SETUP_WARNING,
-    VISERON_SIGNAL_SHUTDOWN,
 )
 from viseron.events import EventData
 from viseron.exceptions import ComponentNotReady, DomainNotReady
+from viseron.helpers import utcnow
 from viseron.helpers.storage import Storage
 
 if TYPE_CHECKING:
@@ -84,11 +88,28 @@ DEFAULT_COMPONENTS = {"webserver", "storage"}
 # If one of these components fail to load, Viseron will activate safe mode
 CRITICAL_COMPONENTS = LOGGING_COMPONENTS | CORE_COMPONENTS | DEFAULT_COMPONENTS
 
-DOMAIN_SETUP_LOCK = threading.Lock()
+# Upper bound of threads used to set up domains
+DOMAIN_SETUP_MAX_WORKERS = 100
 
 LOGGER = logging.getLogger(__name__)
 
 
+def _cached_import(path: str) -> ModuleType:
+    """Return module, skipping the import machinery if it is already imported.
+
+    Modules are added to sys.modules before they finish executing, so modules that
+    are still being imported by another thread go through import_module which waits
+    for the import to finish.
+    """
+    module = sys.modules.get(path)
+    if (
+        module is not None
+        and getattr(getattr(module, "__spec__", None), "_initializing", False) is False
+    ):
+        return module
+    return importlib.import_module(path)
+
+
 class Component:
     """Represents a Viseron component."""
 
@@ -122,7 +143,7 @@ class Component:
 
     def get_component(self):
         """Return component module."""
-        return importlib.import_module(self._path)
+        return _cached_import(self._path)
 
     def validate_component_config(self, component_module):
         """Validate component config."""
@@ -169,37 +190,24 @@ class Component:
                 result = component_module.setup(self._vis, config)
             except ComponentNotReady as error:
                 wait_time = min(
-                    tries * COMPONENT_RETRY_INTERVAL, COMPONENT_RETRY_INTERVAL_MAX
+                    COMPONENT_RETRY_INTERVAL * 2 ** (tries - 1),
+                    COMPONENT_RETRY_INTERVAL_MAX,
                 )
                 LOGGER.error(
                     f"Component {self.name} is not ready. "
                     f"Retrying in {wait_time} seconds in the background. "
                     f"Error: {str(error)}"
                 )
-                retry_timer = threading.Timer(
-                    wait_time,
-                    setup_component,
-                    args=(self._vis, self),
-                    kwargs={"tries": tries + 1},
-                )
-
-                def cancel_retry_timer() -> None:
-                    """Cancel retry timer."""
-                    LOGGER.debug(
-                        "Cancelling retry timer for component %s and try number %s",
-                        self.name,
-                        tries,
-                    )
-                    retry_timer.cancel()
-
-                self._vis.register_signal_handler(
-                    VISERON_SIGNAL_SHUTDOWN, cancel_retry_timer
+                self._vis.background_scheduler.add_job(
+                    _start_component_setup_thread,
+                    "date",
+                    run_date=utcnow() + timedelta(seconds=wait_time),
+                    misfire_grace_time=None,
+                    args=[self._vis, self, tries + 1],
                 )
-                retry_timer.start()
             except Exception as ex:  # pylint: disable=broad-except
-                LOGGER.error(
-                    f"Uncaught exception setting up component {self.name}: {ex}\n"
-                    f"{traceback.format_exc()}"
+                LOGGER.exception(
+                    "Uncaught exception setting up component %s: %s", self.name, ex
                 )
             finally:
                 slow_setup_warning.cancel()
@@ -241,10 +249,8 @@ class Component:
         optional_domains: list[OptionalDomain] | None,
     ) -> None:
         """Add a domain to setup queue."""
-        if (
-            domain in self._vis.data[DOMAINS_TO_SETUP]
-            and identifier in self._vis.data[DOMAINS_TO_SETUP][domain]
-        ):
+        domains_to_setup = self._vis.data[DOMAINS_TO_SETUP]
+        if identifier in domains_to_setup.get(domain, ()):
             LOGGER.warning(
                 f"Domain {domain} with identifier {identifier} already in setup queue. "
                 f"Skipping setup of domain {domain} with identifier {identifier} for "
@@ -261,13 +267,11 @@ class Component:
             optional_domains=optional_domains if optional_domains else [],
         )
         self.domains_to_setup.append(domain_to_setup)
-        self._vis.data[DOMAINS_TO_SETUP].setdefault(domain, {})[
-            identifier
-        ] = domain_to_setup
+        domains_to_setup.setdefault(domain, {})[identifier] = domain_to_setup
 
     def get_domain(self, domain):
         """Return domain module."""
-        return importlib.import_module(f"{self._path}.{domain}")
+        return _cached_import(f"{self._path}.{domain}")
 
     def validate_domain_config(
         self, config, domain, domain_module
@@ -291,91 +295,27 @@ class Component:
         return config, None
 
     def _setup_dependencies(self, domain_to_setup: DomainToSetup) -> bool:
-        """Await the setup of all dependencies."""
-
-        def _slow_dependency_warning(futures) -> None:
-            unfinished_dependencies = [future for future in futures if future.running()]
-            if unfinished_dependencies:
-                LOGGER.warning(
-                    "Domain %s for component %s%s "
-                    "is still waiting for dependencies: %s",
-                    domain_to_setup.domain,
-                    self.name,
-                    (
-                        f" with identifier {domain_to_setup.identifier}"
-                        if domain_to_setup.identifier
-                        else ""
-                    ),
-                    [
-                        f"domain: {future.domain}, identifier: {future.identifier}"
-                        for future in unfinished_dependencies
-                    ],
-                )
+        """Check the result of all dependencies.
 
+        setup_domains only submits a domain once all of its dependencies are done.
+        """
+        setup_tasks = self._vis.data[DOMAIN_SETUP_TASKS]
         dependencies_futures = [
-            self._vis.data[DOMAIN_SETUP_TASKS][required_domain.domain][
-                required_domain.identifier
-            ]
+            setup_tasks[required_domain.domain][required_domain.identifier]
             for required_domain in domain_to_setup.require_domains
         ]
 
         optional_dependencies_futures = [
-            self._vis.data[DOMAIN_SETUP_TASKS][optional_domain.domain][
-                optional_domain.identifier
-            ]
+            setup_tasks[optional_domain.domain][optional_domain.identifier]
             for optional_domain in domain_to_setup.optional_domains
-            if (
-                optional_domain.domain in self._vis.data[DOMAIN_IDENTIFIERS]
-                and optional_domain.identifier
-                in self._vis.data[DOMAIN_IDENTIFIERS][optional_domain.domain]
-            )
+            if optional_domain.identifier in setup_tasks.get(optional_domain.domain, ())
         ]
 
-        if dependencies_futures:
-            LOGGER.debug(
-                "Domain %s for component %s%s will wait for dependencies %s",
-                domain_to_setup.domain,
-                self.name,
-                (
-                    f" with identifier {domain_to_setup.identifier}"
-                    if domain_to_setup.identifier
-                    else ""
-                ),
-                [
-                    f"domain: {future.domain}, identifier: {future.identifier}"
-                    for future in dependencies_futures
-                ],
-            )
-        if optional_dependencies_futures:
-            LOGGER.debug(
-                "Domain %s for component %s%s will wait for optional dependencies %s",
-                domain_to_setup.domain,
-                self.name,
-                (
-                    f" with identifier {domain_to_setup.identifier}"
-                    if domain_to_setup.identifier
-                    else ""
-                ),
-                [
-                    f"domain: {future.domain}, identifier: {future.identifier}"
-                    for future in optional_dependencies_futures
-                ],
-            )
+        dependencies = dependencies_futures + optional_dependencies_futures
+        if not dependencies:
+            return True
 
-        slow_dependency_warning = self._vis.background_scheduler.add_job(
-            _slow_dependency_warning,
-            "interval",
-            seconds=SLOW_DEPENDENCY_WARNING,
-            args=[dependencies_futures + optional_dependencies_futures],
-        )
-        failed = []
-        for future in list(
-            as_completed(dependencies_futures + optional_dependencies_futures)
-        ):
-            if future.result() is True:
-                continue
-            failed.append(future)
-        slow_dependency_warning.remove()
+        failed = [future for future in dependencies if future.result() is not True]
 
         if failed:
             LOGGER.error(
@@ -384,16 +324,59 @@ class Component:
                 domain_to_setup.domain,
                 self.name,
                 [
-                    f"domain: {future.domain}, "  # type: ignore[attr-defined]
-                    f"identifier: {future.identifier}"
+                    f"domain: {future.domain}, identifier: {future.identifier}"
                     for future in failed
                 ],
             )
             return False
         return True
 
-    def setup_domain(self, domain_to_setup: DomainToSetup, tries=1):
-        """Set up domain."""
+    def setup_domain(
+        self,
+        executor: ThreadPoolExecutor,
+        domain_to_setup: DomainToSetup,
+        future: Future | None = None,
+        tries: int = 1,
+    ) -> Future:
+        """Set up domain.
+
+        The setup is run in the executor and the returned future is resolved with the
+        result of the setup. If the domain is not ready, the retry is scheduled using
+        the background scheduler so that no worker is occupied while waiting.
+        """
+        if future is None:
+            future = Future()
+
+        def _setup() -> None:
+            # Retries are made with a future that is already marked as running
+            if tries == 1 and not future.set_running_or_notify_cancel():
+                return
+            try:
+                result = self._setup_domain(executor, future, domain_to_setup, tries)
+            except Exception as error:  # pylint: disable=broad-except
+                future.set_exception(error)
+                return
+            # None means that a retry has been scheduled
+            if result is not None:
+                future.set_result(result)
+
+        try:
+            executor.submit(_setup)
+        except RuntimeError as error:
+            # The executor is shut down if the setup of another domain raised, in
+            # which case a scheduled retry can't be run
+            if not future.done():
+                future.set_exception(error)
+        return future
+
+    def _setup_domain(
+        self,
+        executor: ThreadPoolExecutor,
+        future: Future,
+        domain_to_setup: DomainToSetup,
+        tries: int,
+    ) -> bool | None:
+        """Run a single setup attempt of a domain."""
         LOGGER.info(
             "Setting up domain %s for component %s%s%s",
             domain_to_setup.domain,
@@ -444,13 +427,11 @@ class Component:
                     self._vis, config, domain_to_setup.identifier
                 )
             except DomainNotReady as error:
-                # Cancel the slow setup warning here since the retrying blocks
                 domain_to_setup.error = str(error)
                 domain_to_setup.retrying = True
                 domain_setup_status(self._vis, domain_to_setup, DOMAIN_FAILED)
-                slow_setup_warning.cancel()
                 wait_time = min(
-                    tries * DOMAIN_RETRY_INTERVAL, DOMAIN_RETRY_INTERVAL_MAX
+                    DOMAIN_RETRY_INTERVAL * 2 ** (tries - 1), DOMAIN_RETRY_INTERVAL_MAX
                 )
                 LOGGER.error(
                     f"Domain {domain_to_setup.domain} "
@@ -458,16 +439,15 @@ class Component:
                     f"Retrying in {wait_time} seconds. "
                     f"Error: {str(error)}"
                 )
-                time.sleep(wait_time)
-                # Running with ThreadPoolExecutor and awaiting the future does not
-                # cause a max recursion error if we retry for a long time
-                with ThreadPoolExecutor(max_workers=1) as executor:
-                    future = executor.submit(
-                        self.setup_domain,
-                        domain_to_setup,
-                        tries=tries + 1,
-                    )
-                    return future.result()
+                self._vis.background_scheduler.add_job(
+                    self.setup_domain,
+                    "date",
+                    run_date=utcnow() + timedelta(seconds=wait_time),
+                    misfire_grace_time=None,
+                    args=[executor, domain_to_setup],
+                    kwargs={"future": future, "tries": tries + 1},
+                )
+                return None
             except Exception as error:  # pylint: disable=broad-except
                 LOGGER.exception(
                     f"Uncaught exception setting up domain {domain_to_setup.domain} for"
@@ -569,22 +549,23 @@ def setup_component(vis: Viseron, component: Component, tries: int = 1) -> None:
 def domain_dependencies(vis: Viseron) -> None:
     """Check that domain dependencies are resolved."""
     domain_to_setup: DomainToSetup
-    for domain in vis.data[DOMAINS_TO_SETUP]:
-        for domain_to_setup in vis.data[DOMAINS_TO_SETUP][domain].values():
+    domains_to_setup = vis.data[DOMAINS_TO_SETUP]
+    domain_identifiers = vis.data[DOMAIN_IDENTIFIERS]
+    for domain in domains_to_setup:
+        for domain_to_setup in domains_to_setup[domain].values():
             if domain_to_setup.identifier:
-                vis.data[DOMAIN_IDENTIFIERS].setdefault(
-                    domain_to_setup.domain, []
-                ).append(domain_to_setup.identifier)
+                domain_identifiers.setdefault(domain_to_setup.domain, set()).add(
+                    domain_to_setup.identifier
+                )
 
-    for domain in vis.data[DOMAINS_TO_SETUP]:
-        for domain_to_setup in list(vis.data[DOMAINS_TO_SETUP][domain].values())[:]:
+    for domain in domains_to_setup:
+        # Copy since failed domains are removed while iterating
+        for domain_to_setup in list(domains_to_setup[domain].values()):
             if not domain_to_setup.require_domains:
                 continue
             for require_domain in domain_to_setup.require_domains:
-                if (
-                    require_domain.domain in vis.data[DOMAIN_IDENTIFIERS]
-                    and require_domain.identifier
-                    in vis.data[DOMAIN_IDENTIFIERS][require_domain.domain]
+                if require_domain.identifier in domain_identifiers.get(
+                    require_domain.domain, ()
                 ):
                     continue
                 error = (
@@ -598,7 +579,7 @@ def domain_dependencies(vis: Viseron) -> None:
                 try:
                     domain_setup_status(vis, domain_to_setup, DOMAIN_FAILED)
                     domain_to_setup.component.domains_to_setup.remove(domain_to_setup)
-                    del vis.data[DOMAINS_TO_SETUP][domain_to_setup.domain][
+                    del domains_to_setup[domain_to_setup.domain][
                         domain_to_setup.identifier
                     ]
                 except ValueError:
@@ -608,76 +589,226 @@ def domain_dependencies(vis: Viseron) -> None:
                     )
 
 
-def _setup_domain(
-    vis: Viseron, executor: ThreadPoolExecutor, domain_to_setup: DomainToSetup
-) -> None:
-    with DOMAIN_SETUP_LOCK:
-        future = executor.submit(
-            domain_to_setup.component.setup_domain,
-            domain_to_setup,
-        )
-        setattr(future, "domain", domain_to_setup.domain)
-        setattr(future, "identifier", domain_to_setup.identifier)
-        vis.data[DOMAIN_SETUP_TASKS].setdefault(domain_to_setup.domain, {})[
-            domain_to_setup.identifier
-        ] = future
+def _domain_setup_graph(
+    vis: Viseron,
+) -> dict[tuple[str, str], list[tuple[str, str]]]:
+    """Return the dependencies of each domain to setup."""
+    domains_to_setup = vis.data[DOMAINS_TO_SETUP]
+    graph: dict[tuple[str, str], list[tuple[str, str]]] = {}
+    for domain in domains_to_setup:
+        for domain_to_setup in domains_to_setup[domain].values():
+            dependencies = [
+                (required_domain.domain, required_domain.identifier)
+                for required_domain in domain_to_setup.require_domains
+            ]
+            dependencies += [
+                (optional_domain.domain, optional_domain.identifier)
+                for optional_domain in domain_to_setup.optional_domains
+                if optional_domain.identifier
+                in domains_to_setup.get(optional_domain.domain, ())
+            ]
+            graph[(domain_to_setup.domain, domain_to_setup.identifier)] = dependencies
+    return graph
 
 
-def setup_domain(
-    vis: Viseron, executor: ThreadPoolExecutor, domain_to_setup: DomainToSetup
-) -> None:
-    """Set up single domain and all its dependencies."""
-    with DOMAIN_SETUP_LOCK:
-        if domain_to_setup.identifier in vis.data[DOMAIN_SETUP_TASKS].get(
-            domain_to_setup.domain, {}
-        ):
-            return
+def _remove_unresolved_domain_setup_nodes(
+    graph: dict[tuple[str, str], list[tuple[str, str]]],
+) -> dict[tuple[str, str], list[tuple[str, str]]]:
+    """Remove domains that depend on domains that are not in the graph.
 
-    for required_domain in domain_to_setup.require_domains:
-        setup_domain(
-            vis,
-            executor,
-            vis.data[DOMAINS_TO_SETUP][required_domain.domain][
-                required_domain.identifier
-            ],
-        )
+    Domains that depend on a removed domain are removed as well. The removed domains
+    are returned along with their unresolved dependencies.
+    """
+    removed_nodes: dict[tuple[str, str], list[tuple[str, str]]] = {}
+    while True:
+        unresolved = {
+            node: [dependency for dependency in dependencies if dependency not in graph]
+            for node, dependencies in graph.items()
+        }
+        unresolved = {
+            node: dependencies
+            for node, dependencies in unresolved.items()
+            if dependencies
+        }
+        if not unresolved:
+            return removed_nodes
+        for node in unresolved:
+            del graph[node]
+        removed_nodes.update(unresolved)
 
-    for optional_domain in domain_to_setup.optional_domains:
-        if (
-            optional_domain.domain in vis.data[DOMAIN_IDENTIFIERS]
-            and optional_domain.identifier
-            in vis.data[DOMAIN_IDENTIFIERS][optional_domain.domain]
-        ):
-            setup_domain(
-                vis,
-                executor,
-                vis.data[DOMAINS_TO_SETUP][optional_domain.domain][
-                    optional_domain.identifier
-                ],
-            )
 
-    _setup_domain(vis, executor, domain_to_setup)
+def _sort_domain_setup_graph(
+    graph: dict[tuple[str, str], list[tuple[str, str]]],
+    dependents: dict[tuple[str, str], list[tuple[str, str]]],
+) -> list[tuple[str, str]]:
+    """Sort the domain setup graph topologically using Kahn's algorithm.
+
+    Domains that are part of, or depend on, a circular dependency are left out.
+    """
+    in_degree = {node: len(dependencies) for node, dependencies in graph.items()}
+    ready = [node for node, degree in in_degree.items() if degree == 0]
+    sorted_nodes = []
+    while ready:
+        node = ready.pop()
+        sorted_nodes.append(node)
+        for dependent in dependents[node]:
+            in_degree[dependent] -= 1
+            if in_degree[dependent] == 0:
+                ready.append(dependent)
+    return sorted_nodes
 
 
 def setup_domains(vis: Viseron) -> None:
-    """Set up all domains."""
+    """Set up all domains.
+
+    The dependency graph is built once and each domain is submitted as soon as all
+    of its dependencies have finished their setup.
+    """
     # Check that all domain dependencies are resolved
     domain_dependencies(vis)
 
-    with ThreadPoolExecutor(max_workers=100) as executor:
-        for domain in vis.data[DOMAINS_TO_SETUP]:
-            for domain_to_setup in vis.data[DOMAINS_TO_SETUP][domain].values():
-                setup_domain(vis, executor, domain_to_setup)
+    domains_to_setup = vis.data[DOMAINS_TO_SETUP]
+    setup_tasks = vis.data[DOMAIN_SETUP_TASKS]
+    graph = _domain_setup_graph(vis)
+    failed_nodes = _remove_unresolved_domain_setup_nodes(graph)
+    dependents: dict[tuple[str, str], list[tuple[str, str]]] = {
+        node: [] for node in graph
+    }
+    for node, dependencies in graph.items():
+        for dependency in dependencies:
+            dependents[dependency].append(node)
+    sorted_nodes = _sort_domain_setup_graph(graph, dependents)
+
+    for domain, identifier in chain(graph, failed_nodes):
+        future: Future = Future()
+        setattr(future, "domain", domain)
+        setattr(future, "identifier", identifier)
+        setup_tasks.setdefault(domain, {})[identifier] = future
+
+    for (domain, identifier), missing in failed_nodes.items():
+        domain_to_setup = domains_to_setup[domain][identifier]
+        error = (
+            f"Domain {domain} for component {domain_to_setup.component.name}"
+            f"{(f' with identifier {identifier}' if identifier else '')} "
+            "depends on domains that could not be setup: "
+            + ", ".join(
+                f"domain: {dependency_domain}, identifier: {dependency_identifier}"
+                for dependency_domain, dependency_identifier in missing
+            )
+        )
+        LOGGER.error(error)
+        domain_to_setup.error = error
+        domain_setup_status(vis, domain_to_setup, DOMAIN_FAILED)
+        setup_tasks[domain][identifier].set_result(False)
+
+    for domain, identifier in graph.keys() - set(sorted_nodes):
+        domain_to_setup = domains_to_setup[domain][identifier]
+        error = (
+            f"Domain {domain} for component {domain_to_setup.component.name}"
+            f"{(f' with identifier {identifier}' if identifier else '')} "
+            "is part of, or depends on, a circular dependency"
+        )
+        LOGGER.error(error)
+        domain_to_setup.error = error
+        domain_setup_status(vis, domain_to_setup, DOMAIN_FAILED)
+        setup_tasks[domain][identifier].set_result(False)
+
+    unfinished_dependencies = {node: len(graph[node]) for node in sorted_nodes}
+    unfinished_dependencies_lock = threading.Lock()
+
+    # A domain is only submitted once its dependencies are done and it holds at most
+    # one worker at a time, so one worker per domain means that a domain that blocks
+    # can never starve the setup of another domain. Domain setup is mostly I/O bound
+    # so the extra threads are cheap, and they are only created when needed.
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(DOMAIN_SETUP_MAX_WORKERS, len(sorted_nodes))),
+        thread_name_prefix="domain_setup",
+    )
 
-        for future in as_completed(
-            [
-                future
-                for domain in vis.data[DOMAIN_SETUP_TASKS]
-                for future in vis.data[DOMAIN_SETUP_TASKS][domain].values()
-            ]
-        ):
+    def submit(node: tuple[str, str]) -> None:
+        domain, identifier = node
+        domain_to_setup = domains_to_setup[domain][identifier]
+        domain_to_setup.component.setup_domain(
+            executor,
+            domain_to_setup,
+            future=setup_tasks[domain][identifier],
+        )
+
+    def dependency_done(node: tuple[str, str], future: Future) -> None:
+        """Submit the dependents that have no unfinished dependencies left.
+
+        If the setup of the dependency raised or was cancelled, the dependents are
+        cancelled instead of submitted.
+        """
+        failed = future.cancelled() or future.exception() is not None
+        ready = []
+        with unfinished_dependencies_lock:
+            for dependent in dependents[node]:
+                if dependent not in unfinished_dependencies:
+                    continue
+                if failed:
+                    del unfinished_dependencies[dependent]
+                    ready.append(dependent)
+                    continue
+                unfinished_dependencies[dependent] -= 1
+                if unfinished_dependencies[dependent] == 0:
+                    ready.append(dependent)
+        for dependent in ready:
+            if failed:
+                setup_tasks[dependent[0]][dependent[1]].cancel()
+            else:
+                submit(dependent)
+
+    def slow_dependency_warning() -> None:
+        """Log domains that are still waiting for their dependencies."""
+        with unfinished_dependencies_lock:
+            waiting = [node for node, count in unfinished_dependencies.items() if count]
+        for domain, identifier in waiting:
+            LOGGER.warning(
+                "Domain %s for component %s%s is still waiting for dependencies: %s",
+                domain,
+                domains_to_setup[domain][identifier].component.name,
+                (f" with identifier {identifier}" if identifier else ""),
+                [
+                    f"domain: {dependency_domain}, "
+                    f"identifier: {dependency_identifier}"
+                    for dependency_domain, dependency_identifier in graph[
+                        (domain, identifier)
+                    ]
+                    if not setup_tasks[dependency_domain][dependency_identifier].done()
+                ],
+            )
+
+    slow_dependency_warning_job = None
+    if any(unfinished_dependencies.values()):
+        slow_dependency_warning_job = vis.background_scheduler.add_job(
+            slow_dependency_warning,
+            "interval",
+            seconds=SLOW_DEPENDENCY_WARNING,
+        )
+
+    ready = [node for node in sorted_nodes if not graph[node]]
+    for node in sorted_nodes:
+        setup_tasks[node[0]][node[1]].add_done_callback(partial(dependency_done, node))
+    for node in ready:
+        submit(node)
+
+    setup_futures = list(
+        chain.from_iterable(futures.values() for futures in setup_tasks.values())
+    )
+    try:
+        for future in as_completed(setup_futures):
             # Await results so that any errors are raised
             future.result()
+    except Exception:
+        # Domains that have not started their setup yet are not started at all
+        for future in setup_futures:
+            future.cancel()
+        raise
+    finally:
+        if slow_dependency_warning_job:
+            slow_dependency_warning_job.remove()
+        executor.shutdown(wait=False)
 
 
 STORAGE_KEY = "critical_components_config"
@@ -736,9 +867,22 @@ def activate_safe_mode(vis: Viseron) -> None:
         setup_component(vis, get_component(vis, component, critical_components_config))
 
 
+def _start_component_setup_thread(
+    vis: Viseron, component: Component, tries: int
+) -> None:
+    """Retry the setup of a component in a daemon thread."""
+    threading.Thread(
+        target=setup_component,
+        args=(vis, component),
+        kwargs={"tries": tries},
+        name=f"{component.name}_setup",
+        daemon=True,
+    ).start()
+
+
 def setup_components(vis: Viseron, config: dict[str, Any]) -> None:
     """Set up configured components."""
-    components_in_config = {key.split(" ")[0] for key in config}
+    components_in_config = {key.partition(" ")[0] for key in config}
     # Setup logger first
     for component in components_in_config & LOGGING_COMPONENTS:
         setup_component(vis, get_component(vis, component, config))
@@ -760,38 +904,27 @@ def setup_components(vis: Viseron, config: dict[str, Any]) -> None:
         activate_safe_mode(vis)
         return
 
-    # Setup components in parallel
+    # Setup components in parallel using daemon threads, since a component that hangs
+    # must not block Viseron from exiting. ThreadPoolExecutor workers are joined at
+    # exit so they can't be used here.
+    # Critical components are the logging, core and default components set up above
     setup_threads = []
-    for component in (
-        components_in_config
-        - set(LOGGING_COMPONENTS)
-        - set(CORE_COMPONENTS)
-        - set(DEFAULT_COMPONENTS)
-    ):
-        setup_threads.append(
-            threading.Thread(
-                target=setup_component,
-                args=(vis, get_component(vis, component, config)),
-                name=f"{component}_setup",
-                daemon=True,
-            )
+    for component in components_in_config - CRITICAL_COMPONENTS:
+        setup_thread = threading.Thread(
+            target=setup_component,
+            args=(vis, get_component(vis, component, config)),
+            name=f"{component}_setup",
+            daemon=True,
         )
-    for thread in setup_threads:
-        thread.start()
-
-    def join(thread) -> None:
-        thread.join(timeout=30)
-        time.sleep(0.5)  # Wait for thread to exit properly
-        if thread.is_alive():
-            LOGGER.error(f"{thread.name} did not finish in time")
-
-    with ThreadPoolExecutor(max_workers=100) as executor:
-        setup_thread_future = {
-            executor.submit(join, setup_thread): setup_thread
-            for setup_thread in setup_threads
-        }
-        for future in as_completed(setup_thread_future):
-            future.result()
+        setup_thread.start()
+        setup_threads.append(setup_thread)
+
+    # All threads are started at once so they share the same deadline
+    deadline = timer() + COMPONENT_SETUP_TIMEOUT
+    for setup_thread in setup_threads:
+        setup_thread.join(timeout=max(0, deadline - timer()))
+        if setup_thread.is_alive():
+            LOGGER.error(f"{setup_thread.name} did not finish in time")
 
 
 def domain_setup_status(
@@ -812,7 +945,7 @@ def domain_setup_status(
         can be used to give access to partial functionality of the domain
         (eg the recorder of a camera).
         """
-        domain_module = importlib.import_module(f"viseron.domains.{domain.domain}")
+        domain_module = _cached_import(f"viseron.domains.{domain.domain}")
         if hasattr(domain_module, "setup_failed"):
             domain.error_instance = domain_module.setup_failed(vis, domain)
 
@@ -152,6 +152,7 @@ DOMAIN_RETRY_INTERVAL = 10
 DOMAIN_RETRY_INTERVAL_MAX = 300
 SLOW_SETUP_WARNING = 20
 SLOW_DEPENDENCY_WARNING = 60
+COMPONENT_SETUP_TIMEOUT = 30
 
 
 RESTART_EXIT_CODE = 100
@@ -4,8 +4,7 @@ from __future__ import annotations
 import json
 import logging
 import os
-from tempfile import NamedTemporaryFile
-from threading import Lock
+from threading import Lock, get_ident
 from typing import TYPE_CHECKING, Any
 
 from viseron.const import STORAGE_PATH
@@ -17,6 +16,9 @@ if TYPE_CHECKING:
 
 LOGGER = logging.getLogger(__name__)
 
+# The encoder holds no state between calls so it is shared by all saves
+_ENCODER = JSONEncoder(separators=(",", ":"))
+
 
 class StorageWriteError(ViseronError):
     """Error writing storage data to file."""
@@ -38,51 +40,57 @@ class Storage:
         self.key = key
         self.version = version
         self._lock = Lock()
-
-    def _write(self, data: str) -> None:
-        """Write data to file."""
-        LOGGER.debug("Writing data to %s", self.path)
-        os.makedirs(os.path.dirname(self.path), exist_ok=True)
-
-        temp_file = ""
-        tmp_path = os.path.split(self.path)[0]
+        self._path = os.path.join(STORAGE_PATH, key)
+        self._directory = os.path.dirname(self._path)
+
+    def _write(self, data: dict[str, Any]) -> None:
+        """Serialize data to JSON and write it to file."""
+        LOGGER.debug("Writing data to %s", self._path)
+        os.makedirs(self._directory, exist_ok=True)
+
+        # Saves are serialized by the lock. The pid and thread id keep the name unique
+        # if several instances write to the same key
+        temp_file = f"{self._path}.tmp.{os.getpid()}.{get_ident()}"
+        replaced = False
         try:
-            with NamedTemporaryFile(
-                mode="w", encoding="utf-8", dir=tmp_path, delete=False
-            ) as file:
-                file.write(data)
-                temp_file = file.name
-            os.replace(temp_file, self.path)
+            with open(temp_file, "w", encoding="utf-8") as file:
+                # encode takes the C one-shot path, iterencode is pure Python
+                file.write(_ENCODER.encode(data))
+                file.flush()
+                # Make sure the data is on disk before the file is moved into place
+                os.fdatasync(file.fileno())
+            os.replace(temp_file, self._path)
+            replaced = True
         except OSError as error:
-            LOGGER.error("Error writing to file %s: %s", self.path, error)
+            LOGGER.error("Error writing to file %s: %s", self._path, error)
             raise StorageWriteError from error
         finally:
-            # Remove temp file if it exists
-            if os.path.exists(temp_file):
+            # Remove temp file if it was not moved into place
+            if not replaced and os.path.exists(temp_file):
                 try:
                     os.remove(temp_file)
                 except OSError as err:
                     LOGGER.error(
                         "Failed to delete tempfile %s while saving %s: %s",
                         temp_file,
-                        self.path,
+                        self._path,
                         err,
                     )
 
     def save(self, data: dict) -> None:
         """Write data to file."""
         with self._lock:
-            _data = {
-                "version": self.version,
-                "data": data,
-            }
-            json_data = json.dumps(_data, indent=4, cls=JSONEncoder)
-            self._write(json_data)
+            self._write(
+                {
+                    "version": self.version,
+                    "data": data,
+                }
+            )
 
     def _load(self) -> dict[str, Any]:
         """Load data from file."""
         try:
-            with open(self.path, encoding="utf-8") as file:
+            with open(self._path, encoding="utf-8") as file:
                 data = json.load(file)
                 if data["version"] != self.version:
                     LOGGER.warning(
@@ -93,18 +101,21 @@ class Storage:
                     )
                 return data.get("data", {})
         except FileNotFoundError:
-            LOGGER.debug("Storage file not found: %s", self.path)
+            LOGGER.debug("Storage file not found: %s", self._path)
         except OSError as error:
-            LOGGER.error("Error reading from file %s: %s", self.path, error)
+            LOGGER.error("Error reading from file %s: %s", self._path, error)
             raise StorageReadError from error
         return {}
 
     def load(self) -> dict:
-        """Load data."""
-        with self._lock:
-            return self._load()
+        """Load data.
+
+        No lock is needed since the file is replaced atomically when saved, so a read
+        always sees a complete file.
+        """
+        return self._load()
 
     @property
     def path(self) -> str:
         """Return storage path."""
-        return os.path.join(STORAGE_PATH, self.key)
+        return self._path